@@ -3,24 +3,42 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from typing import Annotated, List, Optional, Dict, Any, Final, Set, Tuple, Union
+from collections import OrderedDict
+import asyncio
+import hashlib
 import httpx
+import math
+import orjson
 import os
 import re
 from dotenv import load_dotenv
 
 # --- Config & App -----------------------------------------------------------
+load_dotenv()
+
 # Why: keep runs reproducible and mildly flexible without multi-pass.
 DEFAULT_TEMPERATURE: float = 0
 DEFAULT_TOP_P: float = 0.9
 DEFAULT_MAX_TOKENS: int = 256
 DEFAULT_SEED: int = 42  # May be ignored by some models; harmless if unsupported.
-MODEL_NAME: str = "mistralai/mistral-7b-instruct"
+# Why: a small model with structured output is enough for rubric grading; override per deployment.
+MODEL_NAME: str = os.getenv("GRADING_MODEL", "mistralai/ministral-3b")
 OPENROUTER_URL: str = "https://openrouter.ai/api/v1/chat/completions"
+# Why: coalesce concurrent /evaluate calls into one completion to share prefill + network cost.
+MAX_BATCH: int = 8
+BATCH_WINDOW_MS: int = 25
+# Why: identical resubmissions/retries should not pay for another LLM round-trip.
+CACHE_MAX_ENTRIES: int = 1024
+# Why: prefill cost grows with input tokens; oversized requests are rejected with a 422.
+MAX_FIELD_CHARS: int = 4096
+MAX_KEYWORDS: int = 32
+MAX_KEYWORD_CHARS: int = 64
+# Why: formatting exception text per request is wasted work during upstream error storms.
+DEBUG_ERRORS: bool = os.getenv("DEBUG_ERRORS", "").lower() in {"1", "true", "yes"}
 
-load_dotenv()
 api_key = os.getenv("OPENROUTER_API_KEY", "")
 
 # Avoid printing full secrets in logs
@@ -32,6 +50,33 @@ else:
 
 app = FastAPI()
 
+# Shared outbound client: one pooled (HTTP/2) connection set reused across requests.
+_client: Optional[httpx.AsyncClient] = None
+
+
+@app.on_event("startup")
+async def open_http_client() -> None:
+    global _client
+    _client = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(30, connect=10),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "HTTP-Referer": "http://localhost",  # Why: identify your app per OpenRouter guidelines.
+            "X-Title": "TheoryMarkerAI",
+            "Content-Type": "application/json",  # Why: bodies are sent pre-encoded via orjson.
+        },
+    )
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 # CORS for development
 app.add_middleware(
     CORSMiddleware,
@@ -55,92 +100,266 @@ async def serve_index():
 
 # --- Models -----------------------------------------------------------------
 class EvaluationInput(BaseModel):
+    # Why: bound input size at the parsing boundary (422), never by silently truncating what gets graded.
+    model_config = ConfigDict(extra="ignore", frozen=True, str_max_length=MAX_FIELD_CHARS)
+
     question: str
     real_answer: str
     student_answer: str
-    keywords: List[str] = Field(default_factory=list)
+    keywords: List[Annotated[str, StringConstraints(max_length=MAX_KEYWORD_CHARS)]] = Field(
+        default_factory=list, max_length=MAX_KEYWORDS
+    )
 
 
 # --- Helpers ----------------------------------------------------------------
 SCORE_RE = re.compile(r"Score\s*:\s*(?P<score>\d+(?:\.\d+)?)\s*/\s*10", re.IGNORECASE)
 GRADE_RE = re.compile(r"Grade\s*:\s*(?P<grade>[A-F][+-]?)", re.IGNORECASE)
 FEEDBACK_RE = re.compile(r"Feedback\s*:\s*(?P<feedback>.+)", re.IGNORECASE | re.DOTALL)
+NUM_FALLBACK_RE = re.compile(r"\b(10|[0-9](?:\.[0-9])?)\b")
+TOKEN_RE = re.compile(r"\w+")
+_WS_RE = re.compile(r"\s+")
 
-
-def clamp_score(value: float, lo: float = 0.0, hi: float = 10.0) -> float:
-    return max(lo, min(hi, value))
+# Why: answers like these are a guaranteed 0/F; don't pay an LLM round-trip for them.
+EMPTY_ANSWERS: Final[frozenset] = frozenset({"", "idk", "n/a"})
+# Opt-in only (?fast_match=true): word-set overlap ignores order and negation.
+FULL_OVERLAP_RATIO: float = 0.95
 
 
-def infer_grade(score10: float) -> str:
-    """Why: ensure we still return a grade if the model omits it."""
-    s = clamp_score(score10)
-    if s >= 9.0:
+def _default_grade(tenths: int) -> str:
+    if tenths >= 90:
         return "A"
-    if s >= 8.0:
+    if tenths >= 80:
         return "B"
-    if s >= 7.0:
+    if tenths >= 70:
         return "C"
-    if s >= 6.0:
+    if tenths >= 60:
         return "D"
-    if s >= 5.0:
+    if tenths >= 50:
         return "E"
     return "F"
 
 
-def build_messages(question: str, model_answer: str, student_answer: str, keywords: List[str]) -> List[Dict[str, str]]:
-    keyword_str = ", ".join(keywords) if keywords else "None"
+# Why: one lookup replaces the grade-inference branch chain on every parsed reply.
+# Indexed by score in whole tenths (0..100) -> fallback grade when the model omits it.
+_GRADE_TABLE: Final[Tuple[str, ...]] = tuple(_default_grade(i) for i in range(101))
 
-    system_prompt = (
-        "You are a professional, fair WAEC examiner. Grade consistently based on accuracy, "
-        "completeness, clarity, structure, technical vocabulary, and depth of reasoning, comparing "
-        "the student to the model answer.\n\n"
-        "Rules:\n"
-        "- No credit for vague/overly general responses.\n"
-        "- Assess only content; ignore tone/effort.\n"
-        "- Accept alternative phrasing if fully correct.\n"
-        "- Penalize missing key terms, incorrect reasoning, or incomplete thoughts.\n"
-        "- Reward clear, well-structured, technically accurate responses.\n"
-        "- If meaning matches the model answer, allow 10/10 even if phrased differently.\n\n"
-        "Output format (STRICT, nothing else):\n"
-        "Score: X/10\n"
-        "Grade: <A-F>\n"
-        "Feedback: <1-2 sentence academic feedback>\n"
-    )
 
-    user_prompt = (
-        f"Question: {question}\n"
-        f"Model Answer: {model_answer}\n"
-        f"Student Answer: {student_answer}\n"
-        f"Keywords: {keyword_str}\n"
+def lookup_score(score_val: float) -> Tuple[int, str]:
+    """Return (integer score, fallback grade); rounding uses the full value, not tenths."""
+    score_val = max(0.0, min(10.0, score_val))
+    return int(round(score_val)), _GRADE_TABLE[int(score_val * 10)]
+
+
+# --- Prompt variants --------------------------------------------------------
+# Why: one dispatcher + N prompt constants instead of divergent copies of the app.
+GRADER_RULES: Final[str] = (
+    "You are a professional, fair WAEC examiner. Grade consistently based on accuracy, "
+    "completeness, clarity, structure, technical vocabulary, and depth of reasoning, comparing "
+    "the student to the model answer.\n\n"
+    "Rules:\n"
+    "- No credit for vague/overly general responses.\n"
+    "- Assess only content; ignore tone/effort.\n"
+    "- Accept alternative phrasing if fully correct.\n"
+    "- Penalize missing key terms, incorrect reasoning, or incomplete thoughts.\n"
+    "- Reward clear, well-structured, technically accurate responses.\n"
+    "- If meaning matches the model answer, allow 10/10 even if phrased differently.\n\n"
+)
+
+STRICT_WAEC_PROMPT: Final[str] = GRADER_RULES + (
+    "Output ONLY a JSON object, nothing else:\n"
+    '{"score": <integer 0-10>, "grade": "<A-F>", "feedback": "<1-2 sentence academic feedback>"}\n'
+)
+
+# Plain-text output for models/routes that don't support response_format.
+STRICT_WAEC_TEXT_PROMPT: Final[str] = GRADER_RULES + (
+    "Output format (STRICT, nothing else):\n"
+    "Score: X/10\n"
+    "Grade: <A-F>\n"
+    "Feedback: <1-2 sentence academic feedback>\n"
+)
+
+JSON_KEYWORDS_PROMPT: Final[str] = (
+    "You are an exam grader. Grade the student's answer based on:\n\n"
+    "1. The question asked\n"
+    "2. The model answer (as a reference)\n"
+    "3. The presence of the required keywords listed with the submission\n\n"
+    "Your grading rules:\n"
+    "- The student MUST mention all important keywords or concepts listed.\n"
+    "- Do NOT rely solely on similarity to the model answer.\n"
+    "- Penalize any missing or incomplete keyword/concept clearly.\n"
+    "- You must extract which keywords were found vs missing.\n\n"
+    "Return:\n"
+    "- score (0 to 10, deduct for missing keywords)\n"
+    "- grade (A, B, C, D, F)\n"
+    "- feedback (brief, max 2 lines)\n"
+    "- found_keywords (list)\n"
+    "- missing_keywords (list)\n\n"
+    "Respond ONLY in this JSON format:\n"
+    '{"score": 6, "grade": "C", "feedback": "The student missed important terms like \'life\'.", '
+    '"found_keywords": ["study"], "missing_keywords": ["life"]}\n'
+)
+
+USER_TEMPLATE: Final[str] = (
+    "Question: {question}\n"
+    "Model Answer: {model_answer}\n"
+    "Student Answer: {student_answer}\n"
+    "Keywords: {keywords}\n"
+)
+
+# variant -> (system_prompt, user_template)
+PROMPTS: Final[Dict[str, Tuple[str, str]]] = {
+    "strict_waec": (STRICT_WAEC_PROMPT, USER_TEMPLATE),
+    "strict_waec_text": (STRICT_WAEC_TEXT_PROMPT, USER_TEMPLATE),
+    "json_keywords": (JSON_KEYWORDS_PROMPT, USER_TEMPLATE),
+    "default": (STRICT_WAEC_PROMPT, USER_TEMPLATE),
+}
+# Variants whose replies are a JSON object rather than "Score:/Grade:/Feedback:" lines.
+JSON_VARIANTS: Final[frozenset] = frozenset({"strict_waec", "json_keywords", "default"})
+# Variants that also report found/missing keywords; batch replies must carry them too.
+KEYWORD_VARIANTS: Final[frozenset] = frozenset({"json_keywords"})
+
+PROMPT_VARIANT: str = os.getenv("GRADING_PROMPT", "strict_waec")
+if PROMPT_VARIANT not in PROMPTS:
+    print(f"WARNING: unknown GRADING_PROMPT {PROMPT_VARIANT!r}; using 'strict_waec'.")
+    PROMPT_VARIANT = "strict_waec"
+
+SYSTEM_PROMPT, _USER_PROMPT = PROMPTS[PROMPT_VARIANT]
+JSON_REPLY: Final[bool] = PROMPT_VARIANT in JSON_VARIANTS
+_BATCH_ITEM_EXAMPLE: Final[str] = (
+    '{"id": <id>, "score": <0-10>, "grade": "<A-F>", "feedback": "<1-2 sentence academic feedback>"'
+    + (', "found_keywords": [...], "missing_keywords": [...]' if PROMPT_VARIANT in KEYWORD_VARIANTS else "")
+    + "}"
+)
+BATCH_SYSTEM_PROMPT: Final[str] = SYSTEM_PROMPT + (
+    "\nBatch mode: you will receive a JSON array of submissions, each with an id. "
+    "Grade each one independently using the rules above.\n"
+    "Instead of the single-answer format, respond with ONLY a JSON object whose \"results\" array "
+    "holds one object per submission, with the same fields plus its id:\n"
+    '{"results": [' + _BATCH_ITEM_EXAMPLE + "]}\n"
+)
+
+# Why: static parts are built once at import; only the user message is allocated per request.
+SYSTEM_MSG: Final[Dict[str, str]] = {"role": "system", "content": SYSTEM_PROMPT}
+BATCH_SYSTEM_MSG: Final[Dict[str, str]] = {"role": "system", "content": BATCH_SYSTEM_PROMPT}
+_BODY_TEMPLATE: Final[Dict[str, Any]] = {
+    "model": MODEL_NAME,
+    "temperature": DEFAULT_TEMPERATURE,
+    "top_p": DEFAULT_TOP_P,
+    "max_tokens": DEFAULT_MAX_TOKENS,
+    "seed": DEFAULT_SEED,  # May be ignored by some routes; improves repeatability if supported.
+}
+if JSON_REPLY:
+    # Why: structured output lets us orjson.loads the reply instead of regex-scraping it.
+    _BODY_TEMPLATE["response_format"] = {"type": "json_object"}
+
+
+def trim_fields(
+    question: str, model_answer: str, student_answer: str, keywords: List[str]
+) -> Tuple[str, str, str, List[str]]:
+    """Why: drop redundant whitespace tokens; size limits are enforced by EvaluationInput."""
+    return (
+        question.strip(),
+        model_answer.strip(),
+        _WS_RE.sub(" ", student_answer).strip(),
+        [kw.strip() for kw in keywords],
     )
 
+
+def build_messages(question: str, model_answer: str, student_answer: str, keywords: List[str]) -> List[Dict[str, str]]:
+    question, model_answer, student_answer, keywords = trim_fields(question, model_answer, student_answer, keywords)
+    keyword_str = ", ".join(keywords) if keywords else "None"
     return [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": user_prompt},
+        SYSTEM_MSG,
+        {
+            "role": "user",
+            "content": _USER_PROMPT.format(
+                question=question,
+                model_answer=model_answer,
+                student_answer=student_answer,
+                keywords=keyword_str,
+            ),
+        },
     ]
 
 
-async def call_openrouter(messages: List[Dict[str, str]]) -> Dict[str, Any]:
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "HTTP-Referer": "http://localhost",  # Why: identify your app per OpenRouter guidelines.
-        "X-Title": "TheoryMarkerAI",
-        "Content-Type": "application/json",
-    }
+def upstream_error(resp: httpx.Response) -> Dict[str, Any]:
+    """Why: report non-200 replies as data; no HTTPStatusError allocation or unwinding."""
+    status = resp.status_code
+    if status == 429:
+        return {"upstream_status": 429, "retry_after": resp.headers.get("Retry-After", "1")}
+    if not DEBUG_ERRORS:
+        return {"upstream_status": status}
+    return {"upstream_status": status, "details": resp.text}
 
-    body: Dict[str, Any] = {
-        "model": MODEL_NAME,
-        "messages": messages,
-        "temperature": DEFAULT_TEMPERATURE,
-        "top_p": DEFAULT_TOP_P,
-        "max_tokens": DEFAULT_MAX_TOKENS,
-        "seed": DEFAULT_SEED,  # May be ignored by some routes; improves repeatability if supported.
-    }
 
-    async with httpx.AsyncClient(timeout=httpx.Timeout(30, connect=10)) as client:
-        resp = await client.post(OPENROUTER_URL, json=body, headers=headers)
-        resp.raise_for_status()
-        return resp.json()
+async def call_openrouter(messages: List[Dict[str, str]], max_tokens: int = DEFAULT_MAX_TOKENS) -> Dict[str, Any]:
+    body: Dict[str, Any] = {**_BODY_TEMPLATE, "messages": messages, "max_tokens": max_tokens}
+
+    if _client is None:
+        raise RuntimeError("HTTP client not initialised; application startup has not run.")
+
+    resp = await _client.post(OPENROUTER_URL, content=orjson.dumps(body))
+    if resp.status_code == 200:
+        return orjson.loads(resp.content)
+    return upstream_error(resp)
+
+
+def json_reply_is_complete(buf: str) -> bool:
+    """Why: stop reading once the reply's JSON object closes and parses."""
+    tail = buf.rstrip()
+    if not tail.endswith("}"):
+        return False  # Cheap gate: only attempt a parse when a closing brace just arrived.
+    start = tail.find("{")
+    if start == -1:
+        return False
+    try:
+        return isinstance(orjson.loads(tail[start:]), dict)
+    except ValueError:
+        return False  # Inner object closed, or braces inside strings; keep reading.
+
+
+def reply_is_complete(buf: str) -> bool:
+    """Why: stop reading once Score, Grade and the first Feedback line are all in."""
+    if JSON_REPLY:
+        return json_reply_is_complete(buf)
+    if not (SCORE_RE.search(buf) and GRADE_RE.search(buf)):
+        return False
+    feedback_match = FEEDBACK_RE.search(buf)
+    if not feedback_match:
+        return False
+    feedback = feedback_match.group("feedback").lstrip()
+    return "\n" in feedback and bool(feedback.split("\n", 1)[0].strip())
+
+
+async def stream_openrouter(
+    messages: List[Dict[str, str]], max_tokens: int = DEFAULT_MAX_TOKENS, stop_early: bool = True
+) -> Union[str, Dict[str, Any]]:
+    body: Dict[str, Any] = {**_BODY_TEMPLATE, "messages": messages, "max_tokens": max_tokens, "stream": True}
+
+    if _client is None:
+        raise RuntimeError("HTTP client not initialised; application startup has not run.")
+
+    buf = ""
+    # Leaving the context early closes the upstream stream, so unused tokens aren't awaited.
+    async with _client.stream("POST", OPENROUTER_URL, content=orjson.dumps(body)) as resp:
+        if resp.status_code != 200:
+            if DEBUG_ERRORS:
+                await resp.aread()
+            return upstream_error(resp)
+        async for line in resp.aiter_lines():
+            if not line.startswith("data:"):
+                continue  # SSE comments / keep-alives
+            payload = line[5:].strip()
+            if payload == "[DONE]":
+                break
+            chunk = orjson.loads(payload)
+            choices = chunk.get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if delta:
+                buf += delta
+                if stop_early and reply_is_complete(buf):
+                    break
+    return buf
 
 
 def parse_model_reply(reply_text: str) -> Dict[str, Any]:
@@ -157,21 +376,18 @@ def parse_model_reply(reply_text: str) -> Dict[str, Any]:
 
     if score_val is None:
         # Fallback: try to find any number 0-10 as last resort
-        nums = re.findall(r"\b(10|[0-9](?:\.[0-9])?)\b", reply_text)
-        if nums:
+        num_match = NUM_FALLBACK_RE.search(reply_text)
+        if num_match:
             try:
-                score_val = float(nums[0])
+                score_val = float(num_match.group(1))
             except ValueError:
                 score_val = None
 
     if score_val is None:
         score_val = 0.0
 
-    score_val = clamp_score(score_val)
-    # Round half up for stability on boundaries
-    score_int = int(round(score_val))
-
-    grade_str = grade_match.group("grade") if grade_match else infer_grade(score_val)
+    score_int, default_grade = lookup_score(score_val)
+    grade_str = grade_match.group("grade") if grade_match else default_grade
 
     feedback_str = (
         feedback_match.group("feedback").strip() if feedback_match else "No feedback found."
@@ -188,10 +404,81 @@ def parse_model_reply(reply_text: str) -> Dict[str, Any]:
     }
 
 
+def normalize_result(obj: Dict[str, Any], raw_response: str) -> Dict[str, Any]:
+    score_val = float(obj.get("score", 0) or 0)
+    if not math.isfinite(score_val):
+        # Why: "Infinity"/"NaN" would overflow round(); surface as ValueError so callers fall back.
+        raise ValueError(f"Non-finite score in reply: {obj.get('score')!r}")
+    score_int, default_grade = lookup_score(score_val)
+    grade = str(obj.get("grade") or "").strip().upper() or default_grade
+    lines = str(obj.get("feedback") or "").strip().splitlines()
+    feedback = lines[0].strip() if lines else "No feedback found."
+    result: Dict[str, Any] = {
+        "score": score_int,
+        "grade": grade,
+        "feedback": feedback,
+        "raw_response": raw_response,
+    }
+    for field in ("found_keywords", "missing_keywords"):
+        if isinstance(obj.get(field), list):
+            result[field] = obj[field]
+    return result
+
+
+def parse_json_reply(reply_text: str) -> Dict[str, Any]:
+    # Why: models often wrap JSON in prose or code fences; take the outermost object.
+    start, end = reply_text.find("{"), reply_text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object found in reply.")
+    obj = orjson.loads(reply_text[start : end + 1])
+    if not isinstance(obj, dict):
+        raise ValueError("Reply JSON is not an object.")
+    return normalize_result(obj, reply_text)
+
+
+def parse_reply(reply_text: str) -> Dict[str, Any]:
+    if JSON_REPLY:
+        try:
+            return parse_json_reply(reply_text)
+        except (ValueError, TypeError):
+            pass  # Fallback: model ignored the JSON format; scrape it like plain text.
+    return parse_model_reply(reply_text)
+
+
+def precheck_answer(item: EvaluationInput, fast_match: bool = False) -> Optional[Dict[str, Any]]:
+    """Why: cheap local verdicts for trivial answers; None means the LLM must grade."""
+    answer = item.student_answer.strip()
+    if answer.lower() in EMPTY_ANSWERS:
+        return {"score": 0, "grade": "F", "feedback": "No substantive answer provided.", "raw_response": ""}
+
+    if not fast_match:
+        return None
+
+    reference = set(TOKEN_RE.findall(item.real_answer.lower()))
+    if reference:
+        overlap = len(reference & set(TOKEN_RE.findall(answer.lower()))) / len(reference)
+        if overlap >= FULL_OVERLAP_RATIO:
+            return {"score": 10, "grade": "A", "feedback": "Answer matches the model answer.", "raw_response": ""}
+    return None
+
+
 # --- Core grading -----------------------------------------------------------
 async def grade_with_mistral(question: str, model_answer: str, student_answer: str, keywords: List[str]) -> Dict[str, Any]:
     messages = build_messages(question, model_answer, student_answer, keywords)
+
+    try:
+        reply = await stream_openrouter(messages)
+    except (ValueError, AttributeError, TypeError):
+        reply = ""  # Malformed stream chunk; retry below without streaming.
+    if isinstance(reply, dict):
+        return reply  # upstream error
+    if reply:
+        return parse_reply(reply)
+
+    # Fallback: full (non-streamed) response body
     data = await call_openrouter(messages)
+    if "upstream_status" in data:
+        return data
 
     # Defensive parsing of OpenRouter shape
     try:
@@ -199,38 +486,273 @@ async def grade_with_mistral(question: str, model_answer: str, student_answer: s
     except (KeyError, IndexError, TypeError) as exc:
         raise RuntimeError(f"Unexpected API response shape: {exc}; payload keys: {list(data.keys())}")
 
-    return parse_model_reply(reply)
+    return parse_reply(reply)
+
+
+# --- Micro-batching ---------------------------------------------------------
+BatchItem = Tuple[EvaluationInput, "asyncio.Future[Dict[str, Any]]"]
+
+_batch_queue: Optional["asyncio.Queue[BatchItem]"] = None
+_batcher_task: Optional["asyncio.Task[None]"] = None
+_dispatch_tasks: Set["asyncio.Task[None]"] = set()  # Why: hold refs so in-flight batches aren't GC'd.
+
+
+def build_batch_messages(inputs: List[EvaluationInput]) -> List[Dict[str, str]]:
+    submissions = []
+    for i, item in enumerate(inputs):
+        question, model_answer, student_answer, keywords = trim_fields(
+            item.question, item.real_answer, item.student_answer, item.keywords
+        )
+        submissions.append(
+            {
+                "id": i,
+                "question": question,
+                "model_answer": model_answer,
+                "student_answer": student_answer,
+                "keywords": keywords,
+            }
+        )
+
+    return [
+        BATCH_SYSTEM_MSG,
+        {"role": "user", "content": orjson.dumps(submissions).decode()},
+    ]
+
+
+def parse_batch_reply(reply_text: str, size: int) -> List[Dict[str, Any]]:
+    # Why: JSON mode yields {"results": [...]}; other models may return a bare (possibly fenced) array.
+    items: Any = None
+    start, end = reply_text.find("{"), reply_text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            obj = orjson.loads(reply_text[start : end + 1])
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict) and isinstance(obj.get("results"), list):
+            items = obj["results"]
+
+    if items is None:
+        start, end = reply_text.find("["), reply_text.rfind("]")
+        if start == -1 or end <= start:
+            raise ValueError("No JSON array found in batch reply.")
+        items = orjson.loads(reply_text[start : end + 1])
+    by_id: Dict[int, Dict[str, Any]] = {}
+    for obj in items:
+        if isinstance(obj, dict) and "id" in obj:
+            by_id[int(obj["id"])] = obj
+
+    if len(by_id) != size or any(i not in by_id for i in range(size)):
+        raise ValueError("Batch reply does not cover every submission.")
+
+    return [normalize_result(by_id[i], orjson.dumps(by_id[i]).decode()) for i in range(size)]
+
+
+async def grade_single(item: EvaluationInput) -> Dict[str, Any]:
+    return await grade_with_mistral(item.question, item.real_answer, item.student_answer, item.keywords)
+
+
+async def grade_batch(inputs: List[EvaluationInput]) -> List[Dict[str, Any]]:
+    data = await call_openrouter(build_batch_messages(inputs), max_tokens=DEFAULT_MAX_TOKENS * len(inputs))
+    if "upstream_status" in data:
+        return [data] * len(inputs)  # Why: retrying one-by-one would only multiply an upstream failure.
+    try:
+        reply = data["choices"][0]["message"]["content"]
+        return parse_batch_reply(reply, len(inputs))
+    except (KeyError, IndexError, TypeError, ValueError):
+        # Fallback: batched output unusable, grade each submission on its own.
+        return list(await asyncio.gather(*(grade_single(item) for item in inputs)))
+
+
+async def dispatch_batch(batch: List[BatchItem]) -> None:
+    inputs = [item for item, _ in batch]
+    try:
+        if len(batch) == 1:
+            results = [await grade_single(inputs[0])]
+        else:
+            results = await grade_batch(inputs)
+    except Exception as exc:
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(exc)
+        return
+
+    for (_, fut), result in zip(batch, results):
+        if not fut.done():
+            fut.set_result(result)
+
+
+def spawn_dispatch(batch: List[BatchItem]) -> None:
+    # Why: dispatch without awaiting so the next window starts collecting immediately.
+    task = asyncio.create_task(dispatch_batch(batch))
+    _dispatch_tasks.add(task)
+    task.add_done_callback(_dispatch_tasks.discard)
+
+
+async def batcher_loop() -> None:
+    assert _batch_queue is not None
+    loop = asyncio.get_running_loop()
+    while True:
+        batch: List[BatchItem] = [await _batch_queue.get()]
+        deadline = loop.time() + BATCH_WINDOW_MS / 1000
+        try:
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(_batch_queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Shutdown mid-window: items are already off the queue, so hand them on before exiting.
+            spawn_dispatch(batch)
+            raise
+        spawn_dispatch(batch)
+
+
+async def submit_for_grading(item: EvaluationInput) -> Dict[str, Any]:
+    if _batch_queue is None:
+        return await grade_single(item)
+    fut: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+    await _batch_queue.put((item, fut))
+    return await fut
+
+
+# --- Response cache ---------------------------------------------------------
+# Stores futures (not results) so concurrent duplicates share one in-flight call.
+_response_cache: "OrderedDict[str, asyncio.Future[Dict[str, Any]]]" = OrderedDict()
+
+
+def cache_key(item: EvaluationInput) -> str:
+    payload = orjson.dumps([item.question, item.real_answer, item.student_answer, sorted(item.keywords)])
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+async def grade_cached(item: EvaluationInput) -> Dict[str, Any]:
+    key = cache_key(item)
+    cached = _response_cache.get(key)
+    if cached is not None:
+        _response_cache.move_to_end(key)
+        return await asyncio.shield(cached)
+
+    fut: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+    _response_cache[key] = fut
+    if len(_response_cache) > CACHE_MAX_ENTRIES:
+        _response_cache.popitem(last=False)
+
+    try:
+        result = await submit_for_grading(item)
+    except BaseException as exc:
+        # Why: never cache failures; drop the entry so the next request retries.
+        if _response_cache.get(key) is fut:
+            del _response_cache[key]
+        if isinstance(exc, Exception):
+            fut.set_exception(exc)
+            fut.exception()  # Why: mark retrieved to avoid "never retrieved" warnings.
+        else:
+            fut.cancel()
+        raise
+
+    if "upstream_status" in result and _response_cache.get(key) is fut:
+        del _response_cache[key]  # Upstream errors are shared with waiters but not cached.
+    fut.set_result(result)
+    return result
+
+
+@app.on_event("startup")
+async def start_batcher() -> None:
+    global _batch_queue, _batcher_task
+    _batch_queue = asyncio.Queue()
+    _batcher_task = asyncio.create_task(batcher_loop())
+
+
+@app.on_event("shutdown")
+async def stop_batcher() -> None:
+    """Why: single shutdown hook so in-flight batches finish before the shared client closes."""
+    global _batch_queue, _batcher_task
+    if _batcher_task is not None:
+        _batcher_task.cancel()
+        try:
+            await _batcher_task
+        except asyncio.CancelledError:
+            pass
+
+    # Flush anything still queued, then wait for every dispatched batch.
+    pending: List[BatchItem] = []
+    while _batch_queue is not None and not _batch_queue.empty():
+        pending.append(_batch_queue.get_nowait())
+    for start in range(0, len(pending), MAX_BATCH):
+        spawn_dispatch(pending[start : start + MAX_BATCH])
+    if _dispatch_tasks:
+        await asyncio.gather(*_dispatch_tasks, return_exceptions=True)
+
+    _batcher_task = None
+    _batch_queue = None
+    await close_http_client()
 
 
 # --- API Routes -------------------------------------------------------------
+# Preallocated payloads for common upstream failures; detailed str(e) only when DEBUG_ERRORS is set.
+_ERROR_RESPONSES: Final[Dict[int, Dict[str, Any]]] = {
+    code: {"error": "OpenRouter returned an error.", "status_code": code} for code in (500, 502, 503)
+}
+_RATE_LIMITED: Final[Dict[str, str]] = {"error": "rate_limited"}
+_NETWORK_ERROR: Final[Dict[str, str]] = {"error": "Network error while contacting OpenRouter."}
+_UNEXPECTED_ERROR: Final[Dict[str, str]] = {"error": "Grading failed due to an unexpected error."}
+
+
 @app.post("/evaluate")
-async def evaluate_answer(input: EvaluationInput):
+async def evaluate_answer(input: EvaluationInput, fast_match: bool = False):
+    # Short-circuit: skip the LLM for empty answers (and, if requested, near-verbatim matches).
+    precheck = precheck_answer(input, fast_match=fast_match)
+    if precheck is not None:
+        return precheck
+
     if not api_key:
         return {
             "error": "Server misconfiguration: OPENROUTER_API_KEY is missing.",
         }
 
     try:
-        result = await grade_with_mistral(
-            input.question,
-            input.real_answer,
-            input.student_answer,
-            input.keywords,
-        )
-        return result
-    except httpx.HTTPStatusError as e:
-        return {
-            "error": "OpenRouter returned an error.",
-            "status_code": e.response.status_code if e.response else None,
-            "details": str(e),
-        }
+        result = await grade_cached(input)
     except httpx.HTTPError as e:
-        return {
-            "error": "Network error while contacting OpenRouter.",
-            "details": str(e),
-        }
+        if not DEBUG_ERRORS:
+            return _NETWORK_ERROR
+        return {**_NETWORK_ERROR, "details": str(e)}
     except Exception as e:
-        return {
-            "error": "Grading failed due to an unexpected error.",
-            "details": str(e),
-        }
+        if not DEBUG_ERRORS:
+            return _UNEXPECTED_ERROR
+        return {**_UNEXPECTED_ERROR, "details": str(e)}
+
+    status = result.get("upstream_status")
+    if status is None:
+        return result
+    if status == 429:
+        # Fast path: pass the upstream back-off straight through to the client.
+        return JSONResponse(_RATE_LIMITED, status_code=429, headers={"Retry-After": result["retry_after"]})
+    if "details" in result:
+        return {"error": "OpenRouter returned an error.", "status_code": status, "details": result["details"]}
+    return _ERROR_RESPONSES.get(status) or {"error": "OpenRouter returned an error.", "status_code": status}
+
+
+# --- Entrypoint -------------------------------------------------------------
+if __name__ == "__main__":
+    import uvicorn
+
+    # Why: libuv event loop + C HTTP parser cut per-request asyncio overhead.
+    try:
+        import uvloop  # noqa: F401
+
+        loop = "uvloop"
+    except ImportError:  # e.g. Windows, where uvloop is unavailable
+        loop = "asyncio"
+
+    uvicorn.run(
+        "main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop=loop,
+        http="httptools",
+        # Each worker has its own cache and batch queue; scale out explicitly.
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+    )